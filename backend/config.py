@@ -17,18 +17,43 @@ class Config:
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
 
+    # Inference backend for local transcription
+    # "ct2" runs faster-whisper on CTranslate2; "onnx" runs an ONNX export
+    # of Whisper with ONNX Runtime (needs optimum[onnxruntime])
+    WHISPER_BACKEND: str = os.getenv("WHISPER_BACKEND", "ct2")
+
+    # ONNX backend only: path or Hugging Face ID of the exported model, and
+    # the ONNX Runtime execution provider, e.g. OpenVINOExecutionProvider
+    WHISPER_ONNX_MODEL: str = os.getenv("WHISPER_ONNX_MODEL", "")
+    WHISPER_ONNX_PROVIDER: str = os.getenv("WHISPER_ONNX_PROVIDER", "CPUExecutionProvider")
+
     # Whisper model size for local transcription
-    # Options: tiny, base, small, medium, large
+    # Options: tiny, base, small, medium, large, or a faster-whisper model ID
+    # "auto" sizes an English model to the host (small.en, medium.en or
+    # distil-large-v3), going by physical cores and RAM
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "base")
 
+    # CTranslate2 compute type for the Whisper model
+    # "auto" picks the fastest type the CPU supports (int8, else float32);
+    # or set one explicitly, e.g. "int16". CTranslate2 has no float16 or
+    # bfloat16 path on CPU, so int8_float16/int8_bfloat16 do not apply here
+    # On macOS under Rosetta, set "int8_float32"
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "auto")
+
+    # Transcriptions the shared Whisper model can run at once
+    # More workers serve more simultaneous sessions, but CPU threads are
+    # split between them, so each transcription runs slower
+    WHISPER_NUM_WORKERS: int = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+
+    # Most audio (seconds) a live transcription session buffers before
+    # dropping the oldest samples
+    MAX_BUFFER_SEC: float = float(os.getenv("MAX_BUFFER_SEC", "30"))
+
     # Default transcription method: "local" or "cloud"
     DEFAULT_TRANSCRIPTION_METHOD: str = os.getenv(
         "DEFAULT_TRANSCRIPTION_METHOD", "local"
     )
 
-    # Upload directory for audio files
-    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./uploads")
-
     @classmethod
     def validate(cls) -> list[str]:
         """Validate configuration and return list of missing required variables."""
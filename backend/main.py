@@ -1,16 +1,12 @@
-import os
-import tempfile
+import asyncio
 import logging
 from datetime import datetime
 from typing import Optional
 
-import base64
-import json
-
+import orjson
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from google.oauth2.credentials import Credentials
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 
 from config import config
 from models import (
@@ -22,18 +18,22 @@ from models import (
     GoogleDocResponse,
     HealthResponse,
 )
+from services.audio import decode_audio
 from services.transcription import (
     transcribe,
+    warmup_whisper_model,
     is_whisper_available,
     is_cloud_available,
 )
 from services.diarization import (
     diarize,
+    get_diarization_pipeline,
     align_transcription_with_speakers,
     merge_consecutive_speaker_segments,
     is_diarization_available,
 )
 from services.google_docs import (
+    get_credentials,
     create_document,
     list_folders,
     is_google_docs_available,
@@ -51,6 +51,7 @@ app = FastAPI(
     title="Dictation API",
     description="Speech-to-text transcription with speaker diarization",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS for frontend
@@ -62,17 +63,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Ensure upload directory exists
-os.makedirs(config.UPLOAD_DIR, exist_ok=True)
+# Keep references to background tasks so they aren't garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def preload_model(name: str, loader) -> None:
+    """Load a model on a worker thread, logging instead of raising on failure."""
+    try:
+        await asyncio.to_thread(loader)
+        logger.info(f"{name} preloaded")
+    except Exception as e:
+        logger.warning(f"Failed to preload {name}: {e}")
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Log configuration warnings on startup."""
+    """Log configuration warnings and start loading models on startup."""
     warnings = config.validate()
     for warning in warnings:
         logger.warning(warning)
 
+    # Load models in the background so the first request doesn't pay for it;
+    # requests arriving before then still load them lazily
+    preloads = []
+    if is_whisper_available():
+        preloads.append(preload_model("Whisper model", warmup_whisper_model))
+    if is_diarization_available():
+        preloads.append(preload_model("Diarization pipeline", get_diarization_pipeline))
+
+    for preload in preloads:
+        task = asyncio.create_task(preload)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -110,29 +133,45 @@ async def transcribe_audio(
             status_code=400, detail="Cloud transcription not available. Set OPENAI_API_KEY."
         )
 
-    # Save uploaded file temporarily
-    suffix = os.path.splitext(file.filename)[1] if file.filename else ".wav"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-        content = await file.read()
-        temp_file.write(content)
-        temp_path = temp_file.name
+    # Work straight from the uploaded file object (already spooled by the
+    # server) rather than copying it to another temp file on disk
+    upload = file.file
+    filename = file.filename or "audio.wav"
 
     try:
-        logger.info(f"Processing audio file: {file.filename} ({len(content)} bytes)")
+        logger.info(f"Processing audio file: {filename} ({file.size} bytes)")
+
+        run_diarization = enable_diarization and is_diarization_available()
+
+        # Decode once and share the waveform between Whisper and pyannote;
+        # cloud transcription uploads the original file instead
+        waveform = None
+        if method == TranscriptionMethod.LOCAL or run_diarization:
+            waveform = await asyncio.to_thread(decode_audio, upload)
 
-        # Run transcription
-        text, trans_segments, duration = await transcribe(temp_path, method, language)
+        # Local transcription reads the decoded waveform, cloud uploads the file
+        if method == TranscriptionMethod.LOCAL:
+            source = waveform
+        else:
+            upload.seek(0)
+            source = (filename, upload)
 
-        # Run diarization if enabled and available
-        if enable_diarization and is_diarization_available():
+        # Run diarization if enabled and available, concurrently with transcription
+        if run_diarization:
             logger.info("Running speaker diarization...")
-            speaker_segments = await diarize(temp_path)
+            (text, trans_segments, duration), speaker_segments = await asyncio.gather(
+                transcribe(source, method, language),
+                diarize(waveform),
+            )
             aligned_segments = align_transcription_with_speakers(
                 trans_segments, speaker_segments
             )
             merged_segments = merge_consecutive_speaker_segments(aligned_segments)
         else:
-            # No diarization - use single speaker
+            text, trans_segments, duration = await transcribe(source, method, language)
+
+            # No diarization - use single speaker. SpeakerSegment is a plain
+            # dataclass, so building these runs no validators.
             merged_segments = [
                 SpeakerSegment(
                     speaker="Speaker",
@@ -143,21 +182,24 @@ async def transcribe_audio(
                 for seg in trans_segments
             ]
 
-        return TranscriptionResult(
+        # Segments come straight from our own transcription pipeline and are
+        # already well-typed, so skip validating each one again
+        result = TranscriptionResult.model_construct(
             text=text,
             segments=merged_segments,
             duration=duration,
             language=language,
         )
 
+        # Return the result directly so FastAPI doesn't validate and serialize
+        # every segment a second time. pydantic writes the JSON in one pass,
+        # without first building an intermediate list of segment dicts.
+        return Response(content=result.model_dump_json(), media_type="application/json")
+
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        # Clean up temp file
-        os.unlink(temp_path)
-
 
 @app.post("/save-to-docs", response_model=GoogleDocResponse)
 async def save_to_google_docs(
@@ -176,8 +218,8 @@ async def save_to_google_docs(
         )
 
     try:
-        # Create credentials from access token
-        credentials = Credentials(token=access_token)
+        # Get (cached) credentials for the access token
+        credentials = get_credentials(access_token)
 
         result = await create_document(
             credentials=credentials,
@@ -207,7 +249,7 @@ async def get_google_folders(
         )
 
     try:
-        credentials = Credentials(token=access_token)
+        credentials = get_credentials(access_token)
         folders = await list_folders(credentials)
         return {"folders": folders}
 
@@ -216,21 +258,29 @@ async def get_google_folders(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def send_ws_message(websocket: WebSocket, message: dict) -> None:
+    """Send a JSON message over the WebSocket, serialized with orjson."""
+    await websocket.send_text(orjson.dumps(message).decode())
+
+
 @app.websocket("/ws/transcribe")
 async def websocket_transcribe(websocket: WebSocket):
     """
     WebSocket endpoint for real-time streaming transcription.
 
     Client sends:
-    - {"type": "audio", "data": "<base64 audio chunk>"}
+    - Binary frames containing raw audio chunks (WebM/Opus)
     - {"type": "pause"}
     - {"type": "resume"}
     - {"type": "stop"}
 
     Server sends:
-    - {"type": "segment", "data": {...}}
-    - {"type": "status", "status": "listening" | "transcribing" | "paused"}
+    - {"type": "segments", "data": [{...}, ...]}
+    - {"type": "status", "status": "listening" | "transcribing" | "paused" | "complete"}
     - {"type": "error", "message": "..."}
+
+    Status messages are only sent when the session state changes, not for
+    every audio chunk.
     """
     await websocket.accept()
     logger.info("WebSocket connection established")
@@ -239,50 +289,44 @@ async def websocket_transcribe(websocket: WebSocket):
     transcriber = StreamingTranscriber()
 
     # Send initial status
-    await websocket.send_json({"type": "status", "status": "listening"})
+    await send_ws_message(websocket, {"type": "status", "status": "listening"})
 
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            msg_type = message.get("type")
-
-            if msg_type == "audio":
-                # Decode audio chunk
-                audio_data = base64.b64decode(message.get("data", ""))
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
 
-                # Add to buffer and get any transcribed segments
-                await websocket.send_json({"type": "status", "status": "transcribing"})
-                segments = transcriber.add_chunk(audio_data)
+            if message.get("bytes") is not None:
+                # Audio arrives as binary frames, no base64/JSON decoding needed
+                # Decoding and transcription run on a worker thread so other
+                # sessions keep being served meanwhile
+                segments = await asyncio.to_thread(transcriber.add_chunk, message["bytes"])
 
-                # Send any new segments
-                for segment in segments:
-                    await websocket.send_json({
-                        "type": "segment",
-                        "data": segment
-                    })
+                # Send any new segments together in one frame
+                if segments:
+                    await send_ws_message(websocket, {"type": "segments", "data": segments})
+                continue
 
-                await websocket.send_json({"type": "status", "status": "listening"})
+            # Text frames carry JSON control messages
+            msg_type = orjson.loads(message["text"]).get("type")
 
-            elif msg_type == "pause":
+            if msg_type == "pause":
                 transcriber.pause()
-                await websocket.send_json({"type": "status", "status": "paused"})
+                await send_ws_message(websocket, {"type": "status", "status": "paused"})
 
             elif msg_type == "resume":
                 transcriber.resume()
-                await websocket.send_json({"type": "status", "status": "listening"})
+                await send_ws_message(websocket, {"type": "status", "status": "listening"})
 
             elif msg_type == "stop":
                 # Flush remaining audio
-                await websocket.send_json({"type": "status", "status": "transcribing"})
-                segments = transcriber.flush()
-                for segment in segments:
-                    await websocket.send_json({
-                        "type": "segment",
-                        "data": segment
-                    })
-                await websocket.send_json({"type": "status", "status": "complete"})
+                await send_ws_message(websocket, {"type": "status", "status": "transcribing"})
+                segments = await asyncio.to_thread(transcriber.flush)
+                if segments:
+                    await send_ws_message(websocket, {"type": "segments", "data": segments})
+                await send_ws_message(websocket, {"type": "status", "status": "complete"})
                 break
 
     except WebSocketDisconnect:
@@ -290,7 +334,7 @@ async def websocket_transcribe(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         try:
-            await websocket.send_json({"type": "error", "message": str(e)})
+            await send_ws_message(websocket, {"type": "error", "message": str(e)})
         except:
             pass
 
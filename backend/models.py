@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from pydantic import BaseModel
 from typing import Optional
 from enum import Enum
@@ -8,7 +9,10 @@ class TranscriptionMethod(str, Enum):
     CLOUD = "cloud"
 
 
-class SpeakerSegment(BaseModel):
+# Plain slotted dataclass rather than a model: thousands are built per
+# transcript, and pydantic still validates it where it's used as a field
+@dataclass(slots=True, frozen=True)
+class SpeakerSegment:
     """A segment of speech from a single speaker."""
 
     speaker: str
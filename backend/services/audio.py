@@ -0,0 +1,22 @@
+"""
+Audio decoding shared by the transcription and diarization services.
+"""
+from typing import BinaryIO, Union
+
+import numpy as np
+
+# Sample rate expected by Whisper and pyannote
+SAMPLE_RATE = 16000
+
+
+def decode_audio(audio: Union[str, BinaryIO]) -> np.ndarray:
+    """
+    Decode an audio file (path or open binary file) to 16 kHz mono float32 samples.
+
+    This is the input format faster-whisper consumes directly, and it can be
+    handed to pyannote as an in-memory waveform, so an upload only needs to
+    be decoded once per request.
+    """
+    from faster_whisper import decode_audio as _decode_audio
+
+    return _decode_audio(audio, sampling_rate=SAMPLE_RATE)
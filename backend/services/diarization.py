@@ -1,43 +1,81 @@
+import asyncio
 import logging
-from typing import Optional
+import threading
+from typing import Optional, Union
+
+import numpy as np
 
 from config import config
 from models import SpeakerSegment
+from services.audio import SAMPLE_RATE
 
 logger = logging.getLogger(__name__)
 
+# pyannote is optional; probe for it once instead of on every availability check
+try:
+    from pyannote.audio import Pipeline as _Pipeline
+
+    _PYANNOTE_OK = True
+except ImportError:
+    _Pipeline = None
+    _PYANNOTE_OK = False
+
 # Lazy load diarization pipeline
 _diarization_pipeline = None
+# Startup preloading and the first diarized upload may race to load it
+_diarization_pipeline_lock = threading.Lock()
 
 
 def get_diarization_pipeline():
     """Load pyannote diarization pipeline on first use."""
     global _diarization_pipeline
     if _diarization_pipeline is None:
-        if not config.HF_TOKEN:
-            raise ValueError("HuggingFace token not configured for diarization")
+        with _diarization_pipeline_lock:
+            if _diarization_pipeline is None:
+                if not config.HF_TOKEN:
+                    raise ValueError("HuggingFace token not configured for diarization")
 
-        from pyannote.audio import Pipeline
+                if not _PYANNOTE_OK:
+                    raise ValueError("pyannote.audio not installed for diarization")
 
-        logger.info("Loading pyannote diarization pipeline...")
-        _diarization_pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1", use_auth_token=config.HF_TOKEN
-        )
+                logger.info("Loading pyannote diarization pipeline...")
+                _diarization_pipeline = _Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1", use_auth_token=config.HF_TOKEN
+                )
 
     return _diarization_pipeline
 
 
-async def diarize(audio_path: str) -> list[dict]:
+async def diarize(audio: Union[str, np.ndarray]) -> list[dict]:
     """
     Perform speaker diarization on audio file.
 
+    Args:
+        audio: Path to audio file, or 16 kHz mono float32 samples that
+            have already been decoded
+
     Returns:
         List of speaker segments with start, end, and speaker label
     """
-    pipeline = get_diarization_pipeline()
-
-    logger.info(f"Running speaker diarization: {audio_path}")
-    diarization = pipeline(audio_path)
+    if isinstance(audio, np.ndarray):
+        import torch
+
+        logger.info(f"Running speaker diarization: {len(audio)} samples")
+        # Hand pyannote the decoded waveform so it does not decode the file again
+        pipeline_input = {
+            "waveform": torch.from_numpy(audio).unsqueeze(0),
+            "sample_rate": SAMPLE_RATE,
+        }
+    else:
+        logger.info(f"Running speaker diarization: {audio}")
+        pipeline_input = audio
+
+    def run_pipeline():
+        pipeline = get_diarization_pipeline()
+        return pipeline(pipeline_input)
+
+    # Run on a worker thread so it can overlap with transcription
+    diarization = await asyncio.to_thread(run_pipeline)
 
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -61,28 +99,57 @@ def align_transcription_with_speakers(
     For each transcription segment, find the speaker who was talking
     during most of that segment.
     """
-    aligned = []
-
-    for trans_seg in transcription_segments:
-        trans_start = trans_seg["start"]
-        trans_end = trans_seg["end"]
-        trans_mid = (trans_start + trans_end) / 2
-
-        # Find speaker at midpoint of transcription segment
-        speaker = "Unknown"
-        for spk_seg in speaker_segments:
-            if spk_seg["start"] <= trans_mid <= spk_seg["end"]:
-                speaker = spk_seg["speaker"]
-                break
-
-        aligned.append(
-            SpeakerSegment(
-                speaker=speaker,
-                start_time=trans_start,
-                end_time=trans_end,
-                text=trans_seg["text"],
-            )
+    if not speaker_segments:
+        speakers = ["Unknown"] * len(transcription_segments)
+    else:
+        # Speaker turns come back from pyannote ordered by start time, so the
+        # turn containing each midpoint can be found in one vectorized search.
+        spk_starts = np.fromiter(
+            (s["start"] for s in speaker_segments),
+            dtype=np.float64,
+            count=len(speaker_segments),
+        )
+        spk_ends = np.fromiter(
+            (s["end"] for s in speaker_segments),
+            dtype=np.float64,
+            count=len(speaker_segments),
         )
+        spk_labels = [s["speaker"] for s in speaker_segments] + ["Unknown"]
+
+        trans_starts = np.fromiter(
+            (t["start"] for t in transcription_segments),
+            dtype=np.float64,
+            count=len(transcription_segments),
+        )
+        trans_ends = np.fromiter(
+            (t["end"] for t in transcription_segments),
+            dtype=np.float64,
+            count=len(transcription_segments),
+        )
+        mids = (trans_starts + trans_ends) * 0.5
+
+        # Find speaker at midpoint of each transcription segment: the first
+        # turn with start <= mid <= end. Turns can overlap, so a midpoint may
+        # sit inside a long turn that started before the latest one. Turns up
+        # to `last_started` have started by the midpoint; the first of them
+        # still running is the first index where the running max of the
+        # ends reaches it.
+        last_started = np.searchsorted(spk_starts, mids, side="right") - 1
+        first_running = np.searchsorted(np.maximum.accumulate(spk_ends), mids, side="left")
+
+        # Midpoints outside every turn point at the trailing "Unknown" label
+        idx = np.where(first_running <= last_started, first_running, len(speaker_segments))
+        speakers = [spk_labels[i] for i in idx.tolist()]
+
+    aligned = [
+        SpeakerSegment(
+            speaker=speaker,
+            start_time=trans_seg["start"],
+            end_time=trans_seg["end"],
+            text=trans_seg["text"],
+        )
+        for trans_seg, speaker in zip(transcription_segments, speakers)
+    ]
 
     return aligned
 
@@ -96,30 +163,46 @@ def merge_consecutive_speaker_segments(
     if not segments:
         return []
 
-    merged = [segments[0]]
+    merged = []
+
+    # Collect text for the current speaker run and join it once when the
+    # speaker changes, rather than rebuilding the segment on every step.
+    cur_speaker = segments[0].speaker
+    cur_start = segments[0].start_time
+    cur_end = segments[0].end_time
+    cur_parts = [segments[0].text]
 
     for seg in segments[1:]:
-        if seg.speaker == merged[-1].speaker:
-            # Same speaker - merge text
-            merged[-1] = SpeakerSegment(
-                speaker=seg.speaker,
-                start_time=merged[-1].start_time,
-                end_time=seg.end_time,
-                text=merged[-1].text + " " + seg.text,
-            )
+        if seg.speaker == cur_speaker:
+            # Same speaker - extend the current run
+            cur_end = seg.end_time
+            cur_parts.append(seg.text)
         else:
-            merged.append(seg)
+            merged.append(
+                SpeakerSegment(
+                    speaker=cur_speaker,
+                    start_time=cur_start,
+                    end_time=cur_end,
+                    text=" ".join(cur_parts),
+                )
+            )
+            cur_speaker = seg.speaker
+            cur_start = seg.start_time
+            cur_end = seg.end_time
+            cur_parts = [seg.text]
+
+    merged.append(
+        SpeakerSegment(
+            speaker=cur_speaker,
+            start_time=cur_start,
+            end_time=cur_end,
+            text=" ".join(cur_parts),
+        )
+    )
 
     return merged
 
 
 def is_diarization_available() -> bool:
     """Check if speaker diarization is available."""
-    if not config.HF_TOKEN:
-        return False
-    try:
-        from pyannote.audio import Pipeline
-
-        return True
-    except ImportError:
-        return False
+    return _PYANNOTE_OK and bool(config.HF_TOKEN)
@@ -1,22 +1,118 @@
+import asyncio
+import hashlib
 import logging
+import threading
 from datetime import datetime
 from typing import Optional
 
+import httplib2
+from cachetools import TTLCache
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
 from config import config
 from models import TranscriptionResult, GoogleDocResponse
 
 logger = logging.getLogger(__name__)
 
+# Largest page size the Drive files.list API allows
+FOLDER_PAGE_SIZE = 1000
+
+# Access tokens are valid for about an hour; keep per-token state for half that
+TOKEN_CACHE_TTL_SECONDS = 30 * 60
+
+# Credentials keyed by access token hash, and built API clients keyed by
+# (api, version, access token hash), so repeat calls for the same user skip
+# credential setup and parsing the discovery document again
+_credentials_cache: TTLCache = TTLCache(maxsize=256, ttl=TOKEN_CACHE_TTL_SECONDS)
+_service_cache: TTLCache = TTLCache(maxsize=256, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+
+def _token_hash(access_token: str) -> str:
+    """Hash an access token for use as a cache key."""
+    return hashlib.blake2b(access_token.encode(), digest_size=16).hexdigest()
+
+
+def get_credentials(access_token: str) -> Credentials:
+    """Return cached Google OAuth credentials for an access token."""
+    key = _token_hash(access_token)
+    credentials = _credentials_cache.get(key)
+    if credentials is None:
+        credentials = Credentials(token=access_token)
+        _credentials_cache[key] = credentials
+    return credentials
+
+
+def get_service(api: str, version: str, credentials: Credentials):
+    """Return a cached Google API service client for these credentials."""
+    key = (api, version, _token_hash(credentials.token))
+    service = _service_cache.get(key)
+    if service is None:
+        service = build(
+            api,
+            version,
+            credentials=credentials,
+            cache_discovery=False,
+            static_discovery=True,
+        )
+        _service_cache[key] = service
+    return service
+
+
+def invalidate_credentials(credentials: Credentials) -> None:
+    """Drop cached credentials and service clients for this access token."""
+    token_hash = _token_hash(credentials.token)
+    _credentials_cache.pop(token_hash, None)
+    for key in [key for key in _service_cache if key[2] == token_hash]:
+        _service_cache.pop(key, None)
+
+
+def _evict_if_unauthorized(error: HttpError, credentials: Credentials) -> None:
+    """Forget cached state when Google rejects the access token."""
+    if error.resp.status == 401:
+        invalidate_credentials(credentials)
+
+
+# httplib2.Http is not thread-safe, so each worker thread keeps its own. It
+# holds its connections open, so later calls on that thread skip the TCP
+# and TLS handshake.
+_thread_local = threading.local()
+
+
+def _thread_http() -> httplib2.Http:
+    """Return the calling thread's shared httplib2.Http."""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http()
+    return http
+
+
+def _execute_in_thread(request, credentials: Credentials):
+    """Execute a Google API request on the current thread's connection."""
+    # Token-only credentials can't be refreshed, so let a 401 come back as
+    # an HttpError (which evicts the cached clients) instead of having
+    # AuthorizedHttp attempt a refresh that raises RefreshError
+    http = AuthorizedHttp(credentials, http=_thread_http(), refresh_status_codes=())
+    return request.execute(http=http)
+
+
+async def _execute(request, credentials: Credentials):
+    """
+    Run a Google API request on a worker thread.
+
+    The cached service clients are shared between requests, so calls use
+    the worker thread's own Http instead of the one bound to the service.
+    """
+    return await asyncio.to_thread(_execute_in_thread, request, credentials)
+
 
 def format_timestamp(seconds: float) -> str:
     """Format seconds as HH:MM:SS."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%02d:%02d:%02d" % (hours, minutes, secs)
 
 
 def format_transcript_for_doc(transcript: TranscriptionResult, title: str) -> str:
@@ -34,16 +130,13 @@ def format_transcript_for_doc(transcript: TranscriptionResult, title: str) -> st
         "",
     ]
 
+    # Only speaker changes get a timestamped heading, so only format then
     current_speaker = None
     for seg in transcript.segments:
-        timestamp = format_timestamp(seg.start_time)
-
         if seg.speaker != current_speaker:
             current_speaker = seg.speaker
-            lines.append(f"\n[{timestamp}] {seg.speaker}:")
-            lines.append(seg.text)
-        else:
-            lines.append(seg.text)
+            lines.append(f"\n[{format_timestamp(seg.start_time)}] {seg.speaker}:")
+        lines.append(seg.text)
 
     return "\n".join(lines)
 
@@ -72,35 +165,53 @@ async def create_document(
         title = f"Transcript - {timestamp}"
 
     # Build service clients
-    docs_service = build("docs", "v1", credentials=credentials)
-    drive_service = build("drive", "v3", credentials=credentials)
-
-    # Create empty document
-    logger.info(f"Creating Google Doc: {title}")
-    doc = docs_service.documents().create(body={"title": title}).execute()
-    document_id = doc["documentId"]
-
-    # Format transcript content
-    content = format_transcript_for_doc(transcript, title)
-
-    # Insert content into document
-    requests = [
-        {
-            "insertText": {
-                "location": {"index": 1},
-                "text": content,
+    docs_service = get_service("docs", "v1", credentials)
+    drive_service = get_service("drive", "v3", credentials)
+
+    try:
+        # Create empty document
+        logger.info(f"Creating Google Doc: {title}")
+        doc = await _execute(
+            docs_service.documents().create(body={"title": title}), credentials
+        )
+        document_id = doc["documentId"]
+
+        # Format transcript content
+        content = format_transcript_for_doc(transcript, title)
+
+        # Insert content into document
+        requests = [
+            {
+                "insertText": {
+                    "location": {"index": 1},
+                    "text": content,
+                }
             }
-        }
-    ]
-    docs_service.documents().batchUpdate(
-        documentId=document_id, body={"requests": requests}
-    ).execute()
+        ]
+        pending = [
+            _execute(
+                docs_service.documents().batchUpdate(
+                    documentId=document_id, body={"requests": requests}
+                ),
+                credentials,
+            )
+        ]
+
+        # Move to folder if specified, while the text insert is in flight
+        if folder_id:
+            pending.append(
+                _execute(
+                    drive_service.files().update(
+                        fileId=document_id, addParents=folder_id, fields="id, parents"
+                    ),
+                    credentials,
+                )
+            )
 
-    # Move to folder if specified
-    if folder_id:
-        drive_service.files().update(
-            fileId=document_id, addParents=folder_id, fields="id, parents"
-        ).execute()
+        await asyncio.gather(*pending)
+    except HttpError as e:
+        _evict_if_unauthorized(e, credentials)
+        raise
 
     document_url = f"https://docs.google.com/document/d/{document_id}"
 
@@ -115,22 +226,41 @@ async def list_folders(credentials: Credentials) -> list[dict]:
     """
     List Google Drive folders the user has access to.
     """
-    drive_service = build("drive", "v3", credentials=credentials)
-
-    results = (
-        drive_service.files()
-        .list(
-            q="mimeType='application/vnd.google-apps.folder' and trashed=false",
-            spaces="drive",
-            fields="files(id, name)",
-            orderBy="name",
-        )
-        .execute()
-    )
+    drive_service = get_service("drive", "v3", credentials)
+
+    folders = []
+    page_token = None
+
+    try:
+        # Page through results, requesting only the fields we return
+        while True:
+            results = await _execute(
+                drive_service.files().list(
+                    q="mimeType='application/vnd.google-apps.folder' and trashed=false",
+                    spaces="drive",
+                    fields="nextPageToken, files(id, name)",
+                    orderBy="name",
+                    pageSize=FOLDER_PAGE_SIZE,
+                    pageToken=page_token,
+                ),
+                credentials,
+            )
+            folders.extend(results.get("files", []))
+
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+    except HttpError as e:
+        _evict_if_unauthorized(e, credentials)
+        raise
+
+    return folders
+
 
-    return results.get("files", [])
+# OAuth client settings are only read at startup, so check them once
+_GOOGLE_DOCS_AVAILABLE = bool(config.GOOGLE_CLIENT_ID and config.GOOGLE_CLIENT_SECRET)
 
 
 def is_google_docs_available() -> bool:
     """Check if Google Docs integration is available."""
-    return bool(config.GOOGLE_CLIENT_ID and config.GOOGLE_CLIENT_SECRET)
+    return _GOOGLE_DOCS_AVAILABLE
@@ -1,18 +1,29 @@
 """
 Streaming transcription service for real-time audio processing.
 """
-import os
-import io
-import tempfile
 import logging
 from typing import Optional, Generator
-from pydub import AudioSegment
+
+import av
+import numpy as np
 
 from config import config
+from services.audio import SAMPLE_RATE
 from services.transcription import get_whisper_model
+from services.webm import WebMDemuxer
 
 logger = logging.getLogger(__name__)
 
+# Text endings that close a sentence; a window ending elsewhere was cut
+# mid-sentence, so the next one is allowed to run longer
+_SENTENCE_ENDINGS = (".", "?", "!")
+
+# Maps int16 PCM to [-1.0, 1.0); float32 so the multiply stays in float32
+_PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+# RMS level (int16 PCM) below which a leftover buffer is treated as silence
+_SILENCE_RMS = 200.0
+
 
 class StreamingTranscriber:
     """
@@ -20,14 +31,26 @@ class StreamingTranscriber:
 
     Accumulates audio chunks and transcribes when buffer reaches threshold.
     Tracks time offset across multiple transcription calls for continuous timestamps.
+    Chunks are demuxed and decoded as they arrive into a preallocated PCM
+    buffer, so each piece of audio is only decoded once.
     """
 
-    def __init__(self, language: Optional[str] = None):
+    def __init__(self, language: Optional[str] = None, beam_size: int = 1):
         self.language = language
-        self.audio_buffer = io.BytesIO()
+        # Greedy decoding by default: live output favours latency over the
+        # small accuracy gain of beam search
+        self.beam_size = beam_size
+        self.demuxer = WebMDemuxer()  # Splits incoming WebM into Opus frames
+        self.decoder = None  # Opus decoder, created once the track header arrives
+        self.resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        # 16 kHz mono PCM decoded so far; only the first buffer_samples are valid
+        self.audio_buffer = np.empty(int(config.MAX_BUFFER_SEC * SAMPLE_RATE), dtype=np.int16)
+        self.buffer_samples = 0
         self.time_offset = 0.0  # Cumulative time from previous chunks
         self.buffer_duration = 0.0  # Duration of current buffer
         self.min_buffer_seconds = 2.0  # Minimum audio before transcribing
+        self.mid_sentence_buffer_seconds = 5.0  # Window after a mid-sentence cut
+        self.sentence_open = False  # Last window ended mid-sentence
         self.is_paused = False
 
     def add_chunk(self, audio_data: bytes) -> list[dict]:
@@ -40,71 +63,118 @@ class StreamingTranscriber:
         Returns:
             List of transcription segments (empty if buffer not ready)
         """
+        # Demux even while paused so the stream stays in sync
+        frames = self.demuxer.feed(audio_data)
+
         if self.is_paused:
             return []
 
-        # Append to buffer
-        self.audio_buffer.write(audio_data)
-
-        # Try to get duration of accumulated audio
         try:
-            self.audio_buffer.seek(0)
-            audio = AudioSegment.from_file(self.audio_buffer, format="webm")
-            self.buffer_duration = len(audio) / 1000.0  # Convert ms to seconds
-            self.audio_buffer.seek(0, 2)  # Seek back to end
-        except Exception as e:
-            logger.debug(f"Could not parse audio duration: {e}")
+            self._decode_frames(frames)
+        except av.error.FFmpegError as e:
+            logger.debug(f"Could not decode audio: {e}")
             return []
-
-        # Transcribe if buffer has enough audio
-        if self.buffer_duration >= self.min_buffer_seconds:
+        self.buffer_duration = self.buffer_samples / SAMPLE_RATE
+
+        # Transcribe if buffer has enough audio; wait longer while a
+        # sentence is still open so it isn't split across windows
+        threshold = (
+            self.mid_sentence_buffer_seconds if self.sentence_open else self.min_buffer_seconds
+        )
+        # A small MAX_BUFFER_SEC must not put the threshold out of reach, or
+        # audio would only ever be dropped from the full buffer; half the
+        # capacity leaves room for the chunk that crosses it
+        threshold = min(threshold, len(self.audio_buffer) / SAMPLE_RATE / 2)
+        if self.buffer_duration >= threshold:
             return self._transcribe_buffer()
 
         return []
 
+    def _decode_frames(self, frames: list[bytes]):
+        """Decode Opus frames and append them to the PCM buffer."""
+        if self.decoder is None:
+            if not frames:
+                return
+            self.decoder = av.CodecContext.create("opus", "r")
+            if self.demuxer.codec_private:
+                self.decoder.extradata = self.demuxer.codec_private
+
+        for payload in frames:
+            for frame in self.decoder.decode(av.Packet(payload)):
+                for resampled in self.resampler.resample(frame):
+                    # Packed s16 mono frames are shaped (1, n)
+                    self._append_samples(resampled.to_ndarray().reshape(-1))
+
+    def _append_samples(self, samples: np.ndarray):
+        """Copy samples into the PCM buffer, dropping the oldest if it is full."""
+        capacity = len(self.audio_buffer)
+        samples = samples[-capacity:]
+        end = self.buffer_samples + len(samples)
+
+        if end > capacity:
+            # Make room in large steps so a stalled session doesn't log
+            # on every frame
+            overflow = min(self.buffer_samples, max(end - capacity, capacity // 4))
+            logger.warning(f"Streaming buffer full, dropping {overflow / SAMPLE_RATE:.2f}s of audio")
+            self.audio_buffer[: self.buffer_samples - overflow] = self.audio_buffer[
+                overflow : self.buffer_samples
+            ]
+            self.buffer_samples -= overflow
+            self.time_offset += overflow / SAMPLE_RATE
+            end = self.buffer_samples + len(samples)
+
+        self.audio_buffer[self.buffer_samples : end] = samples
+        self.buffer_samples = end
+
     def _transcribe_buffer(self) -> list[dict]:
         """Transcribe the current buffer and return segments."""
         try:
-            # Convert buffer to WAV for Whisper
-            self.audio_buffer.seek(0)
-            audio = AudioSegment.from_file(self.audio_buffer, format="webm")
-
-            # Save to temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                audio.export(tmp.name, format="wav")
-                tmp_path = tmp.name
-
-            try:
-                # Transcribe
-                model = get_whisper_model()
-                segments_iter, info = model.transcribe(
-                    tmp_path,
-                    language=self.language,
-                    beam_size=5,
-                )
-
-                # Collect segments with adjusted timestamps
-                segments = []
-                for seg in segments_iter:
-                    segments.append({
-                        "start": seg.start + self.time_offset,
-                        "end": seg.end + self.time_offset,
-                        "text": seg.text.strip(),
-                        "speaker": "Speaker",
-                    })
-
-                # Update time offset for next chunk
-                self.time_offset += self.buffer_duration
-
-                # Clear buffer
-                self.audio_buffer = io.BytesIO()
-                self.buffer_duration = 0.0
-
-                return segments
-
-            finally:
-                # Clean up temp file
-                os.unlink(tmp_path)
+            # faster-whisper takes float32 samples directly, so there's no
+            # need to write a WAV file for it to read back. Scale in place
+            # so the conversion is one cast plus one vectorised multiply.
+            samples = self.audio_buffer[: self.buffer_samples].astype(np.float32)
+            np.multiply(samples, _PCM16_SCALE, out=samples)
+
+            # Transcribe
+            model = get_whisper_model()
+            segments_iter, info = model.transcribe(
+                samples,
+                language=self.language,
+                beam_size=self.beam_size,
+                best_of=1,
+                temperature=0.0,
+                # Each buffer is transcribed independently
+                condition_on_previous_text=False,
+                # Skip silent stretches instead of running the encoder on them
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200),
+            )
+
+            # Decode everything first, then collect segments with adjusted
+            # timestamps in one pass
+            offset = self.time_offset
+            segments = [
+                {
+                    "start": seg.start + offset,
+                    "end": seg.end + offset,
+                    "text": seg.text.strip(),
+                    "speaker": "Speaker",
+                }
+                for seg in list(segments_iter)
+            ]
+
+            # Empty windows (silence) don't hold the next one back
+            if segments:
+                self.sentence_open = not segments[-1]["text"].endswith(_SENTENCE_ENDINGS)
+
+            # Update time offset for next chunk
+            self.time_offset += self.buffer_samples / SAMPLE_RATE
+
+            # Clear buffer
+            self.buffer_samples = 0
+            self.buffer_duration = 0.0
+
+            return segments
 
         except Exception as e:
             logger.error(f"Transcription error: {e}")
@@ -124,13 +194,28 @@ class StreamingTranscriber:
 
         Returns any remaining transcription segments.
         """
-        if self.buffer_duration > 0.3:  # Only transcribe if there's meaningful audio
-            return self._transcribe_buffer()
-        return []
+        if self.buffer_duration <= 0.3:  # Only transcribe if there's meaningful audio
+            return []
+
+        # A silent tail (e.g. a muted mic) isn't worth a Whisper run
+        pcm = self.audio_buffer[: self.buffer_samples]
+        rms = np.sqrt(np.mean(np.square(pcm, dtype=np.float32)))
+        if rms < _SILENCE_RMS:
+            logger.debug(f"Skipping silent {self.buffer_duration:.2f}s tail (RMS {rms:.0f})")
+            self.time_offset += self.buffer_samples / SAMPLE_RATE
+            self.buffer_samples = 0
+            self.buffer_duration = 0.0
+            return []
+
+        return self._transcribe_buffer()
 
     def reset(self):
         """Reset transcriber state for new recording session."""
-        self.audio_buffer = io.BytesIO()
+        self.demuxer = WebMDemuxer()
+        self.decoder = None
+        self.resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        self.buffer_samples = 0
         self.time_offset = 0.0
         self.buffer_duration = 0.0
+        self.sentence_open = False
         self.is_paused = False
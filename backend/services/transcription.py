@@ -1,96 +1,234 @@
+import asyncio
 import os
-import tempfile
 import logging
-from typing import Optional
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+import psutil
 
 from config import config
 from models import TranscriptionMethod, TranscriptionResult, SpeakerSegment
+from services.audio import SAMPLE_RATE
+from services.whisper_backends import CT2Backend, ONNXBackend, WhisperBackend
 
 logger = logging.getLogger(__name__)
 
+# Inference threads go to physical cores only: hyperthreads share the SIMD
+# units the int8 kernels saturate, so counting them slows transcription down
+PHYSICAL_CORES = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+# Each model worker runs its own transcriptions, so the cores are split
+# between them rather than oversubscribed
+WHISPER_CPU_THREADS = max(1, PHYSICAL_CORES // max(1, config.WHISPER_NUM_WORKERS))
+
 # Lazy load whisper to avoid slow startup
 _whisper_model = None
+# Held while loading so the warm-up and a live session don't both load it
+_whisper_model_lock = threading.Lock()
+
+# Shared OpenAI client so requests reuse its HTTP connection pool
+_openai_client = None
+
+
+# CPU compute types in order of preference. CTranslate2 has no float16 or
+# bfloat16 kernels on CPU, so int8 (with float32 activations) is the fastest
+# type it offers there, falling back to float32
+_COMPUTE_TYPE_PREFERENCE = ["int8", "float32"]
+
+
+def select_compute_type() -> str:
+    """Pick the fastest CTranslate2 compute type this CPU supports."""
+    if config.WHISPER_COMPUTE_TYPE != "auto":
+        return config.WHISPER_COMPUTE_TYPE
+
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types("cpu")
+    for compute_type in _COMPUTE_TYPE_PREFERENCE:
+        if compute_type in supported:
+            return compute_type
+    return "default"
+
+
+# Models picked when WHISPER_MODEL=auto, most demanding first, as
+# (min physical cores, min RAM in GiB, CTranslate2 model on the HF hub).
+# Distilled large-v3 keeps large-v3's encoder with only two decoder layers.
+_AUTO_MODEL_TIERS = [
+    (8, 16, "Systran/faster-distil-whisper-large-v3"),
+    (4, 8, "Systran/faster-whisper-medium.en"),
+]
+_AUTO_MODEL_FALLBACK = "Systran/faster-whisper-small.en"
+
+
+def select_model_name() -> str:
+    """Resolve the Whisper model to load, sizing it to the host when set to auto."""
+    if config.WHISPER_MODEL != "auto":
+        return config.WHISPER_MODEL
+
+    ram_gib = psutil.virtual_memory().total / (1 << 30)
+
+    model_name = _AUTO_MODEL_FALLBACK
+    for min_cores, min_ram_gib, candidate in _AUTO_MODEL_TIERS:
+        if PHYSICAL_CORES >= min_cores and ram_gib >= min_ram_gib:
+            model_name = candidate
+            break
+
+    logger.info(
+        f"Auto-selected Whisper model {model_name} "
+        f"({PHYSICAL_CORES} physical cores, {ram_gib:.1f} GiB RAM)"
+    )
+    return model_name
 
 
-def get_whisper_model():
-    """Load faster-whisper model on first use."""
+def get_whisper_model() -> WhisperBackend:
+    """Load the configured Whisper backend on first use."""
     global _whisper_model
     if _whisper_model is None:
-        from faster_whisper import WhisperModel
-
-        logger.info(f"Loading faster-whisper model: {config.WHISPER_MODEL}")
-        # Use CPU with int8 quantization for better compatibility
-        _whisper_model = WhisperModel(
-            config.WHISPER_MODEL,
-            device="cpu",
-            compute_type="int8"
-        )
+        with _whisper_model_lock:
+            if _whisper_model is None:
+                _whisper_model = _load_whisper_backend()
     return _whisper_model
 
 
+def _load_whisper_backend() -> WhisperBackend:
+    """Create the backend selected by WHISPER_BACKEND."""
+    num_workers = max(1, config.WHISPER_NUM_WORKERS)
+    cpu_threads = WHISPER_CPU_THREADS
+
+    if config.WHISPER_BACKEND == "onnx":
+        if not config.WHISPER_ONNX_MODEL:
+            raise ValueError("WHISPER_ONNX_MODEL not configured")
+
+        logger.info(
+            f"Loading ONNX Whisper model: {config.WHISPER_ONNX_MODEL} "
+            f"(provider={config.WHISPER_ONNX_PROVIDER}, cpu_threads={cpu_threads})"
+        )
+        return ONNXBackend(config.WHISPER_ONNX_MODEL, config.WHISPER_ONNX_PROVIDER, cpu_threads)
+
+    if config.WHISPER_BACKEND != "ct2":
+        raise ValueError(f"Unknown WHISPER_BACKEND: {config.WHISPER_BACKEND}")
+
+    import ctranslate2
+
+    # Make temperature-fallback sampling reproducible
+    ctranslate2.set_random_seed(0)
+
+    model_name = select_model_name()
+    compute_type = select_compute_type()
+
+    logger.info(
+        f"Loading faster-whisper model: {model_name} "
+        f"(compute_type={compute_type}, num_workers={num_workers}, "
+        f"cpu_threads={cpu_threads})"
+    )
+    return CT2Backend(model_name, compute_type, cpu_threads, num_workers)
+
+
+def warmup_whisper_model() -> None:
+    """
+    Load the Whisper model and run one second of silence through it.
+
+    The first transcription pays for kernel selection and initial allocations;
+    doing it here keeps that off the first user request.
+    """
+    model = get_whisper_model()
+    segments_iter, info = model.transcribe(
+        np.zeros(SAMPLE_RATE, dtype=np.float32), beam_size=1
+    )
+    list(segments_iter)
+
+
 async def transcribe_local(
-    audio_path: str, language: Optional[str] = None
+    audio: Union[str, np.ndarray], language: Optional[str] = None
 ) -> tuple[str, list[dict], float]:
     """
     Transcribe audio using local faster-whisper model.
 
+    Args:
+        audio: Path to audio file, or 16 kHz mono float32 samples that
+            have already been decoded
+
     Returns:
         Tuple of (full_text, segments, duration)
     """
-    model = get_whisper_model()
-
-    logger.info(f"Transcribing with local faster-whisper: {audio_path}")
-
-    # faster-whisper returns segments iterator and info
-    segments_iter, info = model.transcribe(
-        audio_path,
-        language=language,
-        beam_size=5,
-    )
+    if isinstance(audio, np.ndarray):
+        logger.info(f"Transcribing with local faster-whisper: {len(audio)} samples")
+    else:
+        logger.info(f"Transcribing with local faster-whisper: {audio}")
+
+    def run_model() -> list:
+        model = get_whisper_model()
+        # faster-whisper returns segments iterator and info; decoding
+        # happens as the iterator is consumed, so drain it here too
+        segments_iter, info = model.transcribe(
+            audio,
+            language=language,
+            beam_size=5,
+        )
+        return list(segments_iter)
 
-    segments = []
-    full_text_parts = []
+    # Run on a worker thread so diarization and other requests can proceed
+    raw_segments = await asyncio.to_thread(run_model)
 
-    for seg in segments_iter:
-        segments.append({
+    segments = [
+        {
             "start": seg.start,
             "end": seg.end,
             "text": seg.text.strip(),
-        })
-        full_text_parts.append(seg.text.strip())
+        }
+        for seg in raw_segments
+    ]
 
-    full_text = " ".join(full_text_parts)
-    duration = segments[-1]["end"] if segments else 0.0
+    full_text = " ".join(seg["text"] for seg in segments)
+    duration = raw_segments[-1].end if raw_segments else 0.0
 
     return full_text, segments, duration
 
 
+def get_openai_client():
+    """Create the async OpenAI client on first use."""
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+    return _openai_client
+
+
 async def transcribe_cloud(
-    audio_path: str, language: Optional[str] = None
+    audio: Union[str, tuple[str, BinaryIO]], language: Optional[str] = None
 ) -> tuple[str, list[dict], float]:
     """
     Transcribe audio using OpenAI Whisper API.
 
+    Args:
+        audio: Path to audio file, or a (filename, file object) pair for
+            audio that is already open; the filename tells the API the format
+
     Returns:
         Tuple of (full_text, segments, duration)
     """
-    from openai import OpenAI
-
     if not config.OPENAI_API_KEY:
         raise ValueError("OpenAI API key not configured")
 
-    client = OpenAI(api_key=config.OPENAI_API_KEY)
+    client = get_openai_client()
 
-    logger.info(f"Transcribing with OpenAI API: {audio_path}")
-
-    with open(audio_path, "rb") as audio_file:
-        # Request verbose JSON for timestamps
-        response = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="verbose_json",
-            language=language,
-        )
+    if isinstance(audio, str):
+        logger.info(f"Transcribing with OpenAI API: {audio}")
+        # The async client reads paths without blocking the event loop
+        audio_file = Path(audio)
+    else:
+        logger.info(f"Transcribing with OpenAI API: {audio[0]}")
+        audio_file = audio
+
+    # Request verbose JSON for timestamps
+    response = await client.audio.transcriptions.create(
+        model="whisper-1",
+        file=audio_file,
+        response_format="verbose_json",
+        language=language,
+    )
 
     segments = []
     for seg in response.segments or []:
@@ -108,7 +246,7 @@ async def transcribe_cloud(
 
 
 async def transcribe(
-    audio_path: str,
+    audio: Union[str, np.ndarray, tuple[str, BinaryIO]],
     method: TranscriptionMethod = TranscriptionMethod.LOCAL,
     language: Optional[str] = None,
 ) -> tuple[str, list[dict], float]:
@@ -116,7 +254,8 @@ async def transcribe(
     Transcribe audio file using specified method.
 
     Args:
-        audio_path: Path to audio file
+        audio: Path to audio file, decoded 16 kHz mono samples (local
+            method only), or a (filename, file object) pair (cloud only)
         method: Transcription method (local or cloud)
         language: Language code (auto-detect if None)
 
@@ -124,20 +263,34 @@ async def transcribe(
         Tuple of (full_text, segments, duration)
     """
     if method == TranscriptionMethod.LOCAL:
-        return await transcribe_local(audio_path, language)
+        return await transcribe_local(audio, language)
     else:
-        return await transcribe_cloud(audio_path, language)
+        if isinstance(audio, np.ndarray):
+            raise ValueError("Cloud transcription requires the encoded audio file")
+        return await transcribe_cloud(audio, language)
+
+
+# Probed on first use rather than at import, since importing faster-whisper
+# loads CTranslate2
+_WHISPER_AVAILABLE = None
 
 
 def is_whisper_available() -> bool:
     """Check if local Whisper is available."""
-    try:
-        from faster_whisper import WhisperModel
-        return True
-    except ImportError:
-        return False
+    global _WHISPER_AVAILABLE
+    if _WHISPER_AVAILABLE is None:
+        try:
+            import faster_whisper  # noqa: F401
+            _WHISPER_AVAILABLE = True
+        except ImportError:
+            _WHISPER_AVAILABLE = False
+    return _WHISPER_AVAILABLE
+
+
+# The API key is loaded at startup and never changes
+_CLOUD_AVAILABLE = bool(config.OPENAI_API_KEY)
 
 
 def is_cloud_available() -> bool:
     """Check if cloud transcription is available."""
-    return bool(config.OPENAI_API_KEY)
+    return _CLOUD_AVAILABLE
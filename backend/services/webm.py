@@ -0,0 +1,167 @@
+"""
+Minimal incremental WebM (Matroska) demuxing for streamed MediaRecorder audio.
+
+Only the structure needed to pull out the codec header and the frames of
+a single audio track is understood; frames are returned undecoded.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# EBML element IDs (with their length marker bits, as they appear on the wire)
+SEGMENT_ID = 0x18538067
+TRACKS_ID = 0x1654AE6B
+TRACK_ENTRY_ID = 0xAE
+CODEC_PRIVATE_ID = 0x63A2
+CLUSTER_ID = 0x1F43B675
+BLOCK_GROUP_ID = 0xA0
+BLOCK_ID = 0xA1
+SIMPLE_BLOCK_ID = 0xA3
+
+# Master elements whose children need visiting; everything else is skipped
+_CONTAINER_IDS = {SEGMENT_ID, TRACKS_ID, TRACK_ENTRY_ID, CLUSTER_ID, BLOCK_GROUP_ID}
+
+# Cluster ID as it appears on the wire, used to find a resync point
+_CLUSTER_ID_BYTES = CLUSTER_ID.to_bytes(4, "big")
+
+# Largest leaf element accepted; audio blocks are a few KB at most
+_MAX_ELEMENT_SIZE = 1 << 20
+
+# Size value of an element written with "unknown" length (live streams)
+UNKNOWN_SIZE = -1
+
+# Block flag bits giving the lacing mode
+_LACING_MASK = 0x06
+
+
+def read_vint(data, pos: int, keep_marker: bool = False) -> tuple[int, int] | None:
+    """
+    Read an EBML variable-length integer starting at `pos`.
+
+    Element IDs keep their length marker bits (keep_marker=True); sizes do
+    not, and an all-ones size is reported as UNKNOWN_SIZE.
+
+    Returns:
+        Tuple of (value, position after the integer), or None if `data`
+        ends before the integer does
+    """
+    if pos >= len(data):
+        return None
+
+    first = data[pos]
+    if first == 0:
+        raise ValueError(f"Invalid EBML variable-length integer at offset {pos}")
+
+    length = 9 - first.bit_length()
+    if pos + length > len(data):
+        return None
+
+    value = first if keep_marker else first & ((1 << (8 - length)) - 1)
+    for byte in data[pos + 1 : pos + length]:
+        value = (value << 8) | byte
+
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = UNKNOWN_SIZE
+
+    return value, pos + length
+
+
+class WebMDemuxer:
+    """
+    Splits a WebM byte stream, delivered in arbitrary chunks, into frames.
+
+    Bytes are held only until the element they belong to has fully arrived,
+    so memory use does not grow with the length of the stream. Corrupt data
+    is skipped up to the next Cluster, losing at most one cluster of audio.
+    """
+
+    def __init__(self):
+        self.pending = bytearray()  # Bytes of elements not complete yet
+        self.codec_private = None  # Codec header from the track entry
+        self.resyncing = False  # Skipping ahead to the next Cluster
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """
+        Add the next chunk of the stream.
+
+        Returns:
+            Payloads of the frames completed by this chunk, in stream order
+        """
+        data = self.pending
+        data.extend(chunk)
+
+        frames = []
+        pos = 0
+
+        while True:
+            if self.resyncing:
+                found = data.find(_CLUSTER_ID_BYTES, pos)
+                if found < 0:
+                    # Keep a tail that may hold the start of a Cluster ID
+                    pos = max(pos, len(data) - len(_CLUSTER_ID_BYTES) + 1)
+                    break
+                pos = found
+                self.resyncing = False
+
+            try:
+                next_pos = self._read_element(data, pos, frames)
+            except ValueError as e:
+                logger.warning(f"Corrupt WebM data, skipping to the next cluster: {e}")
+                self.resyncing = True
+                pos += 1
+                continue
+
+            if next_pos is None:
+                break
+            pos = next_pos
+
+        del data[:pos]
+        return frames
+
+    def _read_element(self, data, pos: int, frames: list[bytes]) -> int | None:
+        """
+        Read the element header at `pos`, collecting any frame it holds.
+
+        Returns:
+            Position of the next element (the first child, for containers),
+            or None if the element has not fully arrived
+        """
+        element = read_vint(data, pos, keep_marker=True)
+        if element is None:
+            return None
+        element_id, size_pos = element
+
+        size_info = read_vint(data, size_pos)
+        if size_info is None:
+            return None
+        size, body = size_info
+
+        if element_id in _CONTAINER_IDS:
+            # Step inside; live streams leave Segment/Cluster sizes unknown
+            return body
+
+        if size == UNKNOWN_SIZE:
+            raise ValueError(f"Unexpected unknown-size element {element_id:#x}")
+        if size > _MAX_ELEMENT_SIZE:
+            # Most likely a corrupt size; waiting for it would buffer forever
+            raise ValueError(f"Element {element_id:#x} of {size} bytes at offset {pos}")
+        if body + size > len(data):
+            return None
+
+        if element_id == CODEC_PRIVATE_ID:
+            self.codec_private = bytes(data[body : body + size])
+        elif element_id in (SIMPLE_BLOCK_ID, BLOCK_ID):
+            # Block header: track number vint, int16 relative timecode,
+            # then a flags byte
+            track = read_vint(data, body)
+            if track is None or track[1] + 3 > body + size:
+                raise ValueError(f"Truncated block at offset {pos}")
+            flags = data[track[1] + 2]
+            if flags & _LACING_MASK:
+                # MediaRecorder never laces; drop the block rather than
+                # misreading several frames as one
+                logger.warning(f"Skipping laced block at offset {pos}")
+            else:
+                frames.append(bytes(data[track[1] + 3 : body + size]))
+
+        return body + size
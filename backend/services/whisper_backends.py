@@ -0,0 +1,130 @@
+"""
+Whisper inference backends.
+
+CTranslate2 (faster-whisper) is the default. ONNX Runtime is available for
+hosts where an ONNX Whisper export, e.g. one with int8/int4 MatMulNBits
+weights, runs faster, optionally through an execution provider such as
+OpenVINO.
+"""
+from typing import Any, Iterable, NamedTuple, Optional, Protocol, Union
+
+import numpy as np
+
+from services.audio import SAMPLE_RATE, decode_audio
+
+
+class Segment(NamedTuple):
+    """A transcribed span of audio, with times in seconds."""
+
+    start: float
+    end: float
+    text: str
+
+
+class WhisperBackend(Protocol):
+    """
+    Interface shared by the Whisper backends.
+
+    Mirrors faster-whisper's WhisperModel.transcribe: returns an iterable of
+    segments (objects with start, end and text) and a backend-specific info
+    object. Options a backend has no equivalent for are ignored.
+    """
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str] = None,
+        beam_size: int = 5,
+        **options: Any,
+    ) -> tuple[Iterable[Any], Any]:
+        ...
+
+
+class CT2Backend:
+    """faster-whisper running on CTranslate2."""
+
+    def __init__(self, model_name: str, compute_type: str, cpu_threads: int, num_workers: int):
+        from faster_whisper import WhisperModel
+
+        # Transcribe calls from different threads run concurrently, up to
+        # num_workers at a time
+        self.model = WhisperModel(
+            model_name,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str] = None,
+        beam_size: int = 5,
+        **options: Any,
+    ) -> tuple[Iterable[Any], Any]:
+        return self.model.transcribe(audio, language=language, beam_size=beam_size, **options)
+
+
+class ONNXBackend:
+    """
+    Whisper exported to ONNX, run with ONNX Runtime through Hugging Face Optimum.
+
+    Export a model with `optimum-cli export onnx --model openai/whisper-base <dir>`
+    and optionally quantize it with onnxruntime's MatMulNBits quantizer.
+    """
+
+    def __init__(self, model_path: str, provider: str, cpu_threads: int):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import AutoProcessor, pipeline
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = cpu_threads
+
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(
+            model_path, provider=provider, session_options=session_options
+        )
+        processor = AutoProcessor.from_pretrained(model_path)
+        self.pipeline = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            # Long audio is split into Whisper's 30 s windows
+            chunk_length_s=30,
+        )
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str] = None,
+        beam_size: int = 5,
+        **options: Any,
+    ) -> tuple[Iterable[Any], Any]:
+        if isinstance(audio, str):
+            audio = decode_audio(audio)
+
+        generate_kwargs = {"num_beams": beam_size}
+        if language:
+            generate_kwargs["language"] = language
+
+        result = self.pipeline(
+            {"raw": audio, "sampling_rate": SAMPLE_RATE},
+            return_timestamps=True,
+            generate_kwargs=generate_kwargs,
+        )
+
+        # The final chunk's end is left open when speech runs to the end
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        for chunk in result.get("chunks", []):
+            start, end = chunk["timestamp"]
+            segments.append(
+                Segment(
+                    start=start or 0.0,
+                    end=end if end is not None else duration,
+                    text=chunk["text"],
+                )
+            )
+        return segments, None
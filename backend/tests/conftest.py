@@ -0,0 +1,40 @@
+import io
+
+import av
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 48000
+FRAME_SAMPLES = 960  # 20 ms Opus frames, as MediaRecorder produces
+
+
+def _encode_webm(seconds: float) -> bytes:
+    """Encode a tone as a live WebM/Opus stream with 1 s clusters."""
+    buf = io.BytesIO()
+    with av.open(
+        buf, mode="w", format="webm", options={"live": "1", "cluster_time_limit": "1000"}
+    ) as container:
+        stream = container.add_stream("libopus", rate=SAMPLE_RATE)
+        stream.layout = "mono"
+
+        n = int(seconds * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+        for i in range(0, n, FRAME_SAMPLES):
+            frame = av.AudioFrame.from_ndarray(
+                tone[None, i : i + FRAME_SAMPLES], format="flt", layout="mono"
+            )
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = i
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="session")
+def webm() -> bytes:
+    """Five seconds of live WebM/Opus, like a MediaRecorder stream."""
+    return _encode_webm(5.0)
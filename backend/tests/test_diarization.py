@@ -0,0 +1,64 @@
+import random
+
+from services.diarization import align_transcription_with_speakers
+
+
+def _linear_scan(transcription_segments, speaker_segments):
+    """Reference: first turn (in order) containing each segment's midpoint."""
+    speakers = []
+    for seg in transcription_segments:
+        mid = (seg["start"] + seg["end"]) / 2
+        speaker = "Unknown"
+        for turn in speaker_segments:
+            if turn["start"] <= mid <= turn["end"]:
+                speaker = turn["speaker"]
+                break
+        speakers.append(speaker)
+    return speakers
+
+
+def _segment(start, end):
+    return {"start": start, "end": end, "text": "x"}
+
+
+def _turn(start, end, speaker):
+    return {"start": start, "end": end, "speaker": speaker}
+
+
+def test_no_speakers_gives_unknown():
+    aligned = align_transcription_with_speakers([_segment(0, 1)], [])
+    assert [s.speaker for s in aligned] == ["Unknown"]
+
+
+def test_gaps_and_edges():
+    turns = [_turn(0, 2, "A"), _turn(4, 6, "B")]
+    segments = [_segment(0, 2), _segment(2.5, 3.5), _segment(5, 7), _segment(6, 8)]
+    aligned = align_transcription_with_speakers(segments, turns)
+    assert [s.speaker for s in aligned] == ["A", "Unknown", "B", "Unknown"]
+
+
+def test_midpoint_in_long_turn_overlapping_later_turn():
+    # B starts after A and ends before the midpoint, which is still inside A
+    turns = [_turn(0, 10, "A"), _turn(3, 5, "B")]
+    segments = [_segment(6, 8), _segment(3.5, 4.5)]
+    aligned = align_transcription_with_speakers(segments, turns)
+    assert [s.speaker for s in aligned] == ["A", "A"]
+
+
+def test_matches_linear_scan_on_random_overlapping_turns():
+    rng = random.Random(0)
+    for _ in range(200):
+        turns = []
+        for _ in range(rng.randint(1, 12)):
+            start = rng.uniform(0, 30)
+            turns.append(_turn(start, start + rng.uniform(0.1, 8), rng.choice("ABC")))
+        # pyannote returns turns ordered by start time
+        turns.sort(key=lambda t: t["start"])
+
+        segments = []
+        for _ in range(30):
+            start = rng.uniform(-2, 40)
+            segments.append(_segment(start, start + rng.uniform(0, 3)))
+
+        aligned = align_transcription_with_speakers(segments, turns)
+        assert [s.speaker for s in aligned] == _linear_scan(segments, turns)
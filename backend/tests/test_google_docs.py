@@ -0,0 +1,30 @@
+import asyncio
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from services import google_docs
+
+
+class _UnauthorizedHttp:
+    """Stands in for httplib2.Http, answering every request with a 401."""
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        response = httplib2.Response({"status": 401, "content-type": "application/json"})
+        return response, b'{"error": {"code": 401, "message": "Invalid Credentials"}}'
+
+
+def test_unauthorized_response_evicts_cached_clients(monkeypatch):
+    monkeypatch.setattr(google_docs, "_thread_http", lambda: _UnauthorizedHttp())
+    credentials = google_docs.get_credentials("expired-token")
+    token_hash = google_docs._token_hash("expired-token")
+    assert token_hash in google_docs._credentials_cache
+
+    with pytest.raises(HttpError) as excinfo:
+        asyncio.run(google_docs.list_folders(credentials))
+
+    assert excinfo.value.resp.status == 401
+    assert token_hash not in google_docs._credentials_cache
+    # list_folders cached a drive client for this token before the 401
+    assert not [key for key in google_docs._service_cache if key[2] == token_hash]
@@ -0,0 +1,109 @@
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from config import config
+from services import streaming_transcription
+from services.audio import SAMPLE_RATE
+from services.streaming_transcription import StreamingTranscriber
+
+
+class _FakeModel:
+    """Records each window it is given and returns one fixed segment."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.windows = []
+
+    def transcribe(self, audio, **options):
+        self.windows.append(audio)
+        return iter([SimpleNamespace(start=0.0, end=0.5, text=f" {self.text} ")]), None
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _FakeModel("Hello.")
+    monkeypatch.setattr(streaming_transcription, "get_whisper_model", lambda: fake)
+    return fake
+
+
+def _stream(transcriber: StreamingTranscriber, data: bytes, chunk_size: int = 2000) -> list[dict]:
+    segments = []
+    for pos in range(0, len(data), chunk_size):
+        segments.extend(transcriber.add_chunk(data[pos : pos + chunk_size]))
+    return segments
+
+
+def test_transcribes_stream_in_windows(model, webm):
+    transcriber = StreamingTranscriber()
+    segments = _stream(transcriber, webm)
+    segments.extend(transcriber.flush())
+
+    assert len(model.windows) >= 2
+    assert all(w.dtype == np.float32 and np.abs(w).max() <= 1.0 for w in model.windows)
+    # Every window starts where the previous one ended
+    assert [s["start"] for s in segments] == pytest.approx(
+        np.cumsum([0] + [len(w) / SAMPLE_RATE for w in model.windows[:-1]])
+    )
+    assert transcriber.time_offset == pytest.approx(5.0, abs=0.05)
+
+
+def test_waits_longer_after_mid_sentence_cut(model, webm):
+    model.text = "and then"
+    transcriber = StreamingTranscriber()
+    _stream(transcriber, webm)
+
+    # After the first ~2 s window ends mid-sentence, the rest of the 5 s
+    # stream stays below the 5 s threshold
+    assert len(model.windows) == 1
+    assert transcriber.sentence_open
+
+
+def test_small_max_buffer_still_transcribes(model, webm, monkeypatch, caplog):
+    monkeypatch.setattr(config, "MAX_BUFFER_SEC", 1.0)
+    model.text = "and then"
+    transcriber = StreamingTranscriber()
+
+    with caplog.at_level(logging.WARNING, logger=streaming_transcription.__name__):
+        _stream(transcriber, webm)
+        transcriber.flush()
+
+    # Windows are capped to fit the buffer, so no audio is dropped
+    assert "Streaming buffer full" not in caplog.text
+    assert all(len(w) <= SAMPLE_RATE for w in model.windows)
+    assert transcriber.time_offset == pytest.approx(5.0, abs=0.05)
+
+
+def test_full_buffer_drops_oldest_samples(model):
+    transcriber = StreamingTranscriber()
+    transcriber.audio_buffer = np.empty(1000, dtype=np.int16)
+
+    transcriber._append_samples(np.ones(800, dtype=np.int16))
+    transcriber._append_samples(np.full(400, 2, dtype=np.int16))
+
+    # A quarter of the buffer (250 samples) is dropped from the front
+    pcm = transcriber.audio_buffer[: transcriber.buffer_samples]
+    assert pcm.tolist() == [1] * 550 + [2] * 400
+    assert transcriber.time_offset == pytest.approx(250 / SAMPLE_RATE)
+
+
+def test_flush_skips_silent_tail(model):
+    transcriber = StreamingTranscriber()
+    transcriber._append_samples(np.full(SAMPLE_RATE, 50, dtype=np.int16))
+    transcriber.buffer_duration = 1.0
+
+    assert transcriber.flush() == []
+    assert model.windows == []
+    assert transcriber.buffer_samples == 0
+    assert transcriber.time_offset == pytest.approx(1.0)
+
+
+def test_flush_transcribes_audible_tail(model):
+    transcriber = StreamingTranscriber()
+    transcriber._append_samples(np.full(SAMPLE_RATE, 3000, dtype=np.int16))
+    transcriber.buffer_duration = 1.0
+
+    assert [s["text"] for s in transcriber.flush()] == ["Hello."]
+    assert len(model.windows) == 1
@@ -0,0 +1,79 @@
+import io
+import random
+
+import av
+
+from services.webm import CLUSTER_ID, WebMDemuxer, read_vint
+
+
+def _reference_frames(data: bytes) -> list[bytes]:
+    """Frame payloads as demuxed by libav."""
+    with av.open(io.BytesIO(data)) as container:
+        stream = container.streams.audio[0]
+        return [bytes(packet) for packet in container.demux(stream) if packet.size]
+
+
+def _feed_in_chunks(demuxer: WebMDemuxer, data: bytes, rng: random.Random) -> list[bytes]:
+    frames = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, 4000)
+        frames.extend(demuxer.feed(data[pos : pos + size]))
+        pos += size
+    return frames
+
+
+def test_matches_libav_in_arbitrary_chunks(webm):
+    expected = _reference_frames(webm)
+    for seed in range(5):
+        demuxer = WebMDemuxer()
+        frames = _feed_in_chunks(demuxer, webm, random.Random(seed))
+
+        assert frames == expected
+        assert demuxer.codec_private.startswith(b"OpusHead")
+        assert not demuxer.pending
+
+
+def test_single_byte_chunks(webm):
+    demuxer = WebMDemuxer()
+    frames = []
+    for i in range(len(webm)):
+        frames.extend(demuxer.feed(webm[i : i + 1]))
+    assert frames == _reference_frames(webm)
+
+
+def test_resyncs_after_corrupt_byte_at_element_boundary(webm):
+    expected = _reference_frames(webm)
+    # A stray zero byte (an invalid element ID) just before the second cluster
+    cluster_id = CLUSTER_ID.to_bytes(4, "big")
+    second_cluster = webm.index(cluster_id, webm.index(cluster_id) + 1)
+    corrupt = webm[:second_cluster] + b"\x00" + webm[second_cluster:]
+
+    demuxer = WebMDemuxer()
+    frames = _feed_in_chunks(demuxer, corrupt, random.Random(0))
+
+    # Nothing is lost: parsing picks up again at the cluster that follows
+    assert frames == expected
+    assert not demuxer.pending
+
+
+def test_resyncs_after_corruption_inside_cluster(webm):
+    expected = _reference_frames(webm)
+    # Overwrite the ID of the fifth element inside the second cluster
+    cluster_id = CLUSTER_ID.to_bytes(4, "big")
+    pos = webm.index(cluster_id, webm.index(cluster_id) + 1) + len(cluster_id)
+    _, pos = read_vint(webm, pos)  # Cluster size
+    for _ in range(4):
+        _, size_pos = read_vint(webm, pos, keep_marker=True)
+        size, body = read_vint(webm, size_pos)
+        pos = body + size
+    corrupt = webm[:pos] + b"\x00" + webm[pos + 1 :]
+
+    demuxer = WebMDemuxer()
+    frames = _feed_in_chunks(demuxer, corrupt, random.Random(0))
+
+    # The rest of that cluster (1 s, 50 frames) is skipped, and the stream
+    # after it comes through intact
+    assert len(expected) - 50 <= len(frames) < len(expected)
+    assert frames[-100:] == expected[-100:]
+    assert len(demuxer.pending) < 4
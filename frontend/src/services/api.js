@@ -90,8 +90,8 @@ export class TranscriptionStream {
         try {
           const message = JSON.parse(event.data)
 
-          if (message.type === 'segment' && this.onSegment) {
-            this.onSegment(message.data)
+          if (message.type === 'segments' && this.onSegment) {
+            message.data.forEach((segment) => this.onSegment(segment))
           } else if (message.type === 'status' && this.onStatus) {
             this.onStatus(message.status)
           } else if (message.type === 'error' && this.onError) {
@@ -114,16 +114,8 @@ export class TranscriptionStream {
       return
     }
 
-    // Convert blob to base64
-    const arrayBuffer = await audioBlob.arrayBuffer()
-    const base64 = btoa(
-      new Uint8Array(arrayBuffer).reduce((data, byte) => data + String.fromCharCode(byte), '')
-    )
-
-    this.ws.send(JSON.stringify({
-      type: 'audio',
-      data: base64
-    }))
+    // Send audio as a binary frame; text frames are reserved for control messages
+    this.ws.send(await audioBlob.arrayBuffer())
   }
 
   /**